@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+import logging.handlers
 import sys
 from typing import Any, Sequence
 from mcp.server import Server
@@ -10,119 +11,153 @@ from mcp.server.lowlevel.server import NotificationOptions
 from mcp.server.stdio import stdio_server
 from mcp.types import Resource, Tool, TextContent, ImageContent, EmbeddedResource
 from pydantic import AnyUrl
-import json
-from scraper import HackerNewsScraper
+from scraper import HackerNewsScraper, dumps
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+# Configure logging: buffer records in memory and only hit stderr in
+# batches (or immediately on WARNING+), keeping syscalls off hot paths
+_log_handler = logging.handlers.MemoryHandler(
+    capacity=256,
+    flushLevel=logging.WARNING,
+    target=logging.StreamHandler(sys.stderr)
+)
+logging.basicConfig(level=logging.INFO, handlers=[_log_handler])
 logger = logging.getLogger("hn-job-scraper")
 
 # Initialize the MCP server
 app = Server("hn-job-scraper")
 
 # Initialize scraper (lazy-loaded)
-print("Setting up scraper...", file=sys.stderr)
 scraper = None
 
 def get_scraper():
     global scraper
     if scraper is None:
-        print("Initializing scraper...", file=sys.stderr)
+        logger.debug("Initializing scraper...")
         try:
-            import os
-            print(f"Current working directory: {os.getcwd()}", file=sys.stderr)
             scraper = HackerNewsScraper(enable_cache=False)  # Disable caching for MCP
-            print(f"Scraper initialized successfully with cache dir: {scraper.cache_dir}", file=sys.stderr)
-        except Exception as e:
-            print(f"Error initializing scraper: {e}", file=sys.stderr)
-            import traceback
-            traceback.print_exc(file=sys.stderr)
+            logger.info("Scraper initialized with cache dir: %s", scraper.cache_dir)
+        except Exception:
+            logger.exception("Error initializing scraper")
             raise
     return scraper
 
+# Resource and tool declarations never change, so build (and validate) the
+# Pydantic objects once at import instead of on every handshake call
+_RESOURCES = [
+    Resource(
+        uri=AnyUrl("hn://jobs/latest"),
+        name="Latest HackerNews Jobs",
+        description="Most recent job postings from HackerNews Who's Hiring thread",
+        mimeType="application/json",
+    ),
+    Resource(
+        uri=AnyUrl("hn://jobs/previews"),
+        name="HackerNews Job Previews",
+        description="Job postings with truncated preview text (much smaller payload)",
+        mimeType="application/json",
+    ),
+    Resource(
+        uri=AnyUrl("hn://jobs/search"),
+        name="Search Jobs",
+        description="Search through job postings",
+        mimeType="application/json",
+    ),
+]
+
+_TOOLS = [
+    Tool(
+        name="search_jobs",
+        description="Search through HackerNews job postings",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "query": {
+                    "type": "string",
+                    "description": "Search query (e.g., 'python', 'remote', 'senior developer')"
+                }
+            },
+            "required": ["query"]
+        }
+    ),
+    Tool(
+        name="get_job_details",
+        description="Get detailed information about a specific job posting",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "job_id": {
+                    "type": "string",
+                    "description": "The job posting ID"
+                }
+            },
+            "required": ["job_id"]
+        }
+    ),
+    Tool(
+        name="refresh_jobs",
+        description="Refresh job postings from HackerNews (clears cache)",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "required": []
+        }
+    )
+]
+
+# Static payload; serialized once at import
+_SEARCH_INSTRUCTIONS = dumps({
+    "message": "Use the search_jobs tool to search through job postings",
+    "example": "search_jobs with query 'python' or 'remote' or 'senior'"
+})
+
 @app.list_resources()
 async def list_resources() -> list[Resource]:
     """List available resources (cached job data)"""
-    return [
-        Resource(
-            uri=AnyUrl("hn://jobs/latest"),
-            name="Latest HackerNews Jobs",
-            description="Most recent job postings from HackerNews Who's Hiring thread",
-            mimeType="application/json",
-        ),
-        Resource(
-            uri=AnyUrl("hn://jobs/search"),
-            name="Search Jobs",
-            description="Search through job postings",
-            mimeType="application/json",
-        ),
+    return _RESOURCES
+
+async def _read_latest() -> str:
+    """Serve the full job postings payload"""
+    jobs = await get_scraper().get_jobs()
+    return dumps(jobs)
+
+async def _read_previews() -> str:
+    """Serve the postings without full text; a fraction of the bytes"""
+    jobs = await get_scraper().get_jobs()
+    previews = [
+        {
+            "id": job["id"],
+            "author": job["author"],
+            "timestamp": job["timestamp"],
+            "preview": job["preview"]
+        }
+        for job in jobs
     ]
+    return dumps(previews)
+
+async def _read_search_info() -> str:
+    """Serve the static search instructions"""
+    return _SEARCH_INSTRUCTIONS
+
+# Dispatch keyed on the raw URI string; avoids re-parsing the Pydantic URL
+# per read and makes adding resources a one-line change
+_RESOURCE_DISPATCH = {
+    "hn://jobs/latest": _read_latest,
+    "hn://jobs/previews": _read_previews,
+    "hn://jobs/search": _read_search_info,
+}
 
 @app.read_resource()
 async def read_resource(uri: AnyUrl) -> str:
     """Read a specific resource"""
-    if uri.scheme != "hn":
-        raise ValueError(f"Unsupported URI scheme: {uri.scheme}")
-    
-    path = str(uri).replace("hn://", "")
-    
-    if path == "jobs/latest":
-        # Get latest job postings
-        jobs = get_scraper().scrape_job_postings()
-        return json.dumps(jobs, indent=2)
-    
-    elif path == "jobs/search":
-        # Return search instructions
-        return json.dumps({
-            "message": "Use the search_jobs tool to search through job postings",
-            "example": "search_jobs with query 'python' or 'remote' or 'senior'"
-        }, indent=2)
-    
-    else:
-        raise ValueError(f"Unknown resource path: {path}")
+    handler = _RESOURCE_DISPATCH.get(str(uri))
+    if handler is None:
+        raise ValueError(f"Unknown resource: {uri}")
+    return await handler()
 
 @app.list_tools()
 async def list_tools() -> list[Tool]:
     """List available tools"""
-    return [
-        Tool(
-            name="search_jobs",
-            description="Search through HackerNews job postings",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string",
-                        "description": "Search query (e.g., 'python', 'remote', 'senior developer')"
-                    }
-                },
-                "required": ["query"]
-            }
-        ),
-        Tool(
-            name="get_job_details",
-            description="Get detailed information about a specific job posting",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "job_id": {
-                        "type": "string",
-                        "description": "The job posting ID"
-                    }
-                },
-                "required": ["job_id"]
-            }
-        ),
-        Tool(
-            name="refresh_jobs",
-            description="Refresh job postings from HackerNews (clears cache)",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": []
-            }
-        )
-    ]
+    return _TOOLS
 
 @app.call_tool()
 async def call_tool(name: str, arguments: dict) -> list[TextContent]:
@@ -133,31 +168,21 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         if not query:
             return [TextContent(type="text", text="Please provide a search query")]
         
-        # Get job postings and search
-        jobs = get_scraper().scrape_job_postings()
-        matching_jobs = get_scraper().search_jobs(query, jobs)
-        
-        if not matching_jobs:
+        # Make sure the corpus is scraped and indexed, then query FTS
+        await get_scraper().get_jobs()
+        results = get_scraper().search_jobs(query, limit=20)
+        total_matches = get_scraper().count_jobs(query)
+
+        if not results:
             return [TextContent(
-                type="text", 
+                type="text",
                 text=f"No jobs found matching '{query}'"
             )]
-        
-        # Format results
-        results = []
-        for job in matching_jobs[:20]:  # Limit to first 20 results
-            job_summary = {
-                "id": job["id"],
-                "author": job["author"],
-                "timestamp": job["timestamp"],
-                "preview": job["text"][:300] + "..." if len(job["text"]) > 300 else job["text"]
-            }
-            results.append(job_summary)
-        
+
         return [TextContent(
             type="text",
-            text=f"Found {len(matching_jobs)} jobs matching '{query}'. Showing first {len(results)}:\n\n" +
-                 json.dumps(results, indent=2)
+            text=f"Found {total_matches} jobs matching '{query}'. Showing first {len(results)}:\n\n" +
+                 dumps(results)
         )]
     
     elif name == "get_job_details":
@@ -166,7 +191,7 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
             return [TextContent(type="text", text="Please provide a job ID")]
         
         # Get job postings and find the specific job
-        jobs = get_scraper().scrape_job_postings()
+        jobs = await get_scraper().get_jobs()
         job = next((j for j in jobs if j["id"] == job_id), None)
         
         if not job:
@@ -177,12 +202,12 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
         
         return [TextContent(
             type="text",
-            text=json.dumps(job, indent=2)
+            text=dumps(job)
         )]
     
     elif name == "refresh_jobs":
-        # Since caching is disabled for MCP, just fetch fresh data
-        jobs = get_scraper().scrape_job_postings()
+        # Purge the cache off-loop, drop the snapshot, and scrape fresh
+        jobs = await get_scraper().refresh()
         
         return [TextContent(
             type="text",
@@ -194,10 +219,10 @@ async def call_tool(name: str, arguments: dict) -> list[TextContent]:
 
 async def main():
     """Run the MCP server"""
-    print("Starting MCP server...", file=sys.stderr)
+    logger.info("Starting MCP server...")
     try:
         async with stdio_server() as (read_stream, write_stream):
-            print("Server started, running app...", file=sys.stderr)
+            logger.debug("Server started, running app...")
             await app.run(
                 read_stream,
                 write_stream,
@@ -214,11 +239,22 @@ async def main():
                     ),
                 ),
             )
-    except Exception as e:
-        print(f"Error running MCP server: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc(file=sys.stderr)
+    except Exception:
+        logger.exception("Error running MCP server")
         raise
+    finally:
+        # Close the scraper's HTTP session on shutdown
+        if scraper is not None:
+            await scraper.close()
+        # Flush any buffered log records before exit
+        logging.shutdown()
 
 if __name__ == "__main__":
+    try:
+        # libuv-backed loop; a large win for the fetch fan-out. Not
+        # available on Windows, where the default loop is used instead.
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     asyncio.run(main())
\ No newline at end of file
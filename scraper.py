@@ -1,15 +1,106 @@
-import requests
-from bs4 import BeautifulSoup
-import json
+import asyncio
+import glob
+import logging
+import sqlite3
+import threading
+import aiofiles
+import aiofiles.os
+import aiohttp
+from selectolax.parser import HTMLParser
+import orjson
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from typing import List, Dict, Any
 
+logger = logging.getLogger("hn-job-scraper.scraper")
+
+# Tokenizer shared by indexing and query parsing
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def dumps(obj: Any) -> str:
+    """
+    Serialize to compact JSON via orjson. Consumers are programmatic, and
+    indentation roughly doubles the byte count of the jobs payloads.
+    """
+    return orjson.dumps(obj).decode()
+
+def _strip_html(text: str) -> str:
+    """Strip HTML markup from an item's text field"""
+    return HTMLParser(text).text(strip=True)
+
+# Preview length used by search results and the previews resource
+PREVIEW_CHARS = 300
+
+def _make_preview(text: str) -> str:
+    """Truncate a posting's text to its display preview"""
+    return text[:PREVIEW_CHARS] + '...' if len(text) > PREVIEW_CHARS else text
+
+def _build_job_posting(item: Dict[str, Any], hn_thread_id: str) -> Dict[str, Any]:
+    """Convert an HN API comment item into a job posting dict"""
+    if not item or item.get('deleted') or item.get('dead'):
+        return None
+
+    comment_text = _strip_html(item.get('text', ''))
+
+    # Skip if comment is too short (likely not a job posting)
+    if len(comment_text) < 100:
+        return None
+
+    timestamp = ""
+    if item.get('time'):
+        timestamp = datetime.fromtimestamp(item['time']).isoformat()
+
+    return {
+        'id': str(item.get('id', '')),
+        'author': item.get('by', 'Unknown'),
+        'timestamp': timestamp,
+        'text': comment_text,
+        # Truncated once here so responses never re-slice the full text
+        'preview': _make_preview(comment_text),
+        'scraped_at': datetime.now().isoformat(),
+        'thread_id': hn_thread_id
+    }
+
+def _build_postings_chunk(items: List[Dict[str, Any]], hn_thread_id: str) -> List[Dict[str, Any]]:
+    """Build postings for a chunk of items; module-level so it pickles to workers"""
+    postings = []
+    for item in items:
+        job_posting = _build_job_posting(item, hn_thread_id)
+        if job_posting:
+            postings.append(job_posting)
+    return postings
+
 class HackerNewsScraper:
+    # Thread scraped when callers don't name one
+    DEFAULT_THREAD_ID = "44434574"
+    # Cap on concurrent HN API requests so we don't hammer the site
+    MAX_CONCURRENT_FETCHES = 64
+    # Retries for transient failures (5xx / timeouts)
+    FETCH_RETRIES = 3
+    # How long an in-memory scrape result stays fresh (matches the file cache)
+    SCRAPE_TTL = 3600
+    # Batches below this size are parsed inline; pickling isn't worth it
+    PARSE_POOL_THRESHOLD = 500
+
     def __init__(self, cache_dir: str = None, enable_cache: bool = True):
-        self.base_url = "https://news.ycombinator.com"
+        self.api_url = "https://hacker-news.firebaseio.com/v0"
         self.enable_cache = enable_cache
-        
+        self._session = None  # Lazily created so __init__ stays sync
+        self._pool = None  # Lazily created for large-thread parsing
+        self._fetch_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_FETCHES)
+        # Scrape tasks keyed by thread id: concurrent callers await the same
+        # task, so only one fetch+parse runs per thread per TTL window
+        self._inflight: Dict[str, tuple] = {}
+        # FTS5 search database; lazily created, repopulated per scrape
+        self._db: sqlite3.Connection = None
+        # Corpus rebuilds run in worker threads; serialize them so two
+        # DELETE/INSERT transactions can never interleave on the connection
+        self._db_lock = threading.Lock()
+        # Serializes refreshes so racing callers share one scrape
+        self._refresh_lock = asyncio.Lock()
+
         if not enable_cache:
             self.cache_dir = None
         elif cache_dir is None:
@@ -24,114 +115,356 @@ class HackerNewsScraper:
                 # Fallback to temp directory if cache dir can't be created
                 import tempfile
                 self.cache_dir = tempfile.mkdtemp(prefix="hn_cache_")
-    
-    def scrape_job_postings(self, hn_thread_id: str = "44434574") -> List[Dict[str, Any]]:
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get (or lazily create) the shared aiohttp session"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=100,
+                    limit_per_host=64,
+                    keepalive_timeout=30
+                )
+            )
+        return self._session
+
+    async def close(self):
+        """Close the HTTP session, search database, and worker pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    async def _fetch_item(self, item_id) -> Dict[str, Any]:
         """
-        Scrape job postings from HackerNews 'Who's Hiring' thread
+        Fetch one item from the HN Firebase API, bounded by the shared semaphore.
+        Retries with exponential back-off on 5xx responses and timeouts.
         """
-        # Check cache only if caching is enabled
-        if self.enable_cache and self.cache_dir:
-            cache_file = os.path.join(self.cache_dir, f"hn_jobs_{hn_thread_id}.json")
-            
-            # Check if cached data exists and is recent (less than 1 hour old)
+        url = f"{self.api_url}/item/{item_id}.json"
+        session = self._get_session()
+        backoff = 1.0
+        for attempt in range(self.FETCH_RETRIES):
             try:
-                if os.path.exists(cache_file):
-                    file_age = datetime.now().timestamp() - os.path.getmtime(cache_file)
-                    if file_age < 3600:  # 1 hour in seconds
-                        print(f"Loading from cache: {cache_file}")
-                        with open(cache_file, 'r') as f:
-                            return json.load(f)
+                async with self._fetch_semaphore:
+                    async with session.get(url) as response:
+                        response.raise_for_status()
+                        return await response.json()
+            except (aiohttp.ClientResponseError, aiohttp.ServerTimeoutError, asyncio.TimeoutError) as e:
+                status = getattr(e, 'status', None)
+                # Only retry transient failures (timeouts and server errors)
+                if (status is not None and status < 500) or attempt == self.FETCH_RETRIES - 1:
+                    raise
+                logger.debug("Retrying %s after error: %s", url, e)
+                await asyncio.sleep(backoff)
+                backoff *= 2
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """Get (or lazily create) the worker pool for CPU-bound parsing"""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=os.cpu_count())
+        return self._pool
+
+    async def _build_postings(self, items: List[Dict[str, Any]], hn_thread_id: str) -> List[Dict[str, Any]]:
+        """
+        Build job postings from fetched items. Large batches are split into
+        chunks and handed to the process pool so HTML stripping runs on all
+        cores; small batches aren't worth the pickling overhead.
+        """
+        if len(items) < self.PARSE_POOL_THRESHOLD:
+            return _build_postings_chunk(items, hn_thread_id)
+
+        workers = os.cpu_count() or 1
+        chunk_size = -(-len(items) // workers)  # ceil division
+        chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        parsed_chunks = await asyncio.gather(
+            *(loop.run_in_executor(pool, _build_postings_chunk, chunk, hn_thread_id)
+              for chunk in chunks)
+        )
+        return [posting for chunk in parsed_chunks for posting in chunk]
+
+    async def get_jobs(self, hn_thread_id: str = None) -> List[Dict[str, Any]]:
+        """
+        Get the shared jobs snapshot for a thread.
+
+        All callers receive the same in-memory list; a scrape only runs when
+        there is no fresh snapshot. Use invalidate() to force the next call
+        to re-scrape.
+        """
+        return await self.scrape_job_postings(hn_thread_id or self.DEFAULT_THREAD_ID)
+
+    def invalidate(self, hn_thread_id: str = None):
+        """Drop the in-memory snapshot so the next get_jobs re-scrapes"""
+        if hn_thread_id is None:
+            self._inflight.clear()
+        else:
+            self._inflight.pop(hn_thread_id, None)
+
+    def _purge_cache(self):
+        """Delete cached job files; blocking, so run off the event loop"""
+        if not self.cache_dir:
+            return
+        for path in glob.glob(os.path.join(self.cache_dir, "hn_jobs_*.json")):
+            try:
+                os.remove(path)
             except OSError:
-                # Cache file not accessible, continue with fresh scrape
                 pass
-        
-        print(f"Scraping HackerNews thread: {hn_thread_id}")
-        url = f"{self.base_url}/item?id={hn_thread_id}"
-        
+
+    async def refresh(self, hn_thread_id: str = None) -> List[Dict[str, Any]]:
+        """
+        Force-refresh a thread: purge the disk cache in a worker thread so
+        the event loop keeps serving, drop the snapshot, and scrape fresh.
+        Refreshes are serialized; callers racing an in-flight refresh await
+        its scrape instead of starting their own.
+        """
+        requested_at = datetime.now().timestamp()
+        thread_id = hn_thread_id or self.DEFAULT_THREAD_ID
+
+        async with self._refresh_lock:
+            # Another refresh may have re-scraped while we waited for the
+            # lock; its snapshot is already fresher than this request
+            entry = self._inflight.get(thread_id)
+            if entry and entry[0] >= requested_at:
+                return await self.get_jobs(hn_thread_id)
+
+            await asyncio.to_thread(self._purge_cache)
+            self.invalidate(thread_id)
+            return await self.get_jobs(hn_thread_id)
+
+    async def scrape_job_postings(self, hn_thread_id: str = DEFAULT_THREAD_ID) -> List[Dict[str, Any]]:
+        """
+        Scrape job postings from HackerNews 'Who's Hiring' thread.
+
+        Memoizes the scrape task itself: callers arriving while a scrape is
+        in flight (or within the TTL of a finished one) await the same task
+        instead of triggering duplicate fetches.
+        """
+        now = datetime.now().timestamp()
+        entry = self._inflight.get(hn_thread_id)
+
+        if entry:
+            started_at, task = entry
+            still_fresh = now - started_at < self.SCRAPE_TTL
+            failed = task.done() and (task.cancelled() or task.exception() is not None)
+            if not failed and (not task.done() or still_fresh):
+                return await task
+
+        task = asyncio.create_task(self._do_scrape(hn_thread_id))
+        self._inflight[hn_thread_id] = (now, task)
+
         try:
-            response = requests.get(url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.content, 'html.parser')
-            comments = soup.find_all('tr', class_='athing comtr')
-            
-            job_postings = []
-            
-            for comment in comments:
-                try:
-                    # Extract comment text
-                    comment_text_elem = comment.find('div', class_='comment')
-                    if not comment_text_elem:
-                        continue
-                    
-                    comment_text = comment_text_elem.get_text(strip=True)
-                    
-                    # Skip if comment is too short (likely not a job posting)
-                    if len(comment_text) < 100:
-                        continue
-                    
-                    # Extract comment metadata
-                    comment_id = comment.get('id', '')
-                    
-                    # Extract author
-                    author_elem = comment.find('a', class_='hnuser')
-                    author = author_elem.get_text(strip=True) if author_elem else "Unknown"
-                    
-                    # Extract timestamp
-                    time_elem = comment.find('span', class_='age')
-                    timestamp = time_elem.get('title', '') if time_elem else ""
-                    
-                    job_posting = {
-                        'id': comment_id,
-                        'author': author,
-                        'timestamp': timestamp,
-                        'text': comment_text,
-                        'scraped_at': datetime.now().isoformat(),
-                        'thread_id': hn_thread_id
-                    }
-                    
-                    job_postings.append(job_posting)
-                    
-                except Exception as e:
-                    print(f"Error parsing comment: {e}")
+            return await task
+        except Exception:
+            # Don't cache failures; the next caller retries
+            self._inflight.pop(hn_thread_id, None)
+            raise
+
+    async def _load_cache(self, cache_file: str):
+        """
+        Load cached jobs for a thread. Returns (jobs, etag, fresh) where jobs
+        is None when there is no usable cache and fresh means within the TTL.
+        """
+        try:
+            stat = await aiofiles.os.stat(cache_file)
+            file_age = datetime.now().timestamp() - stat.st_mtime
+            async with aiofiles.open(cache_file, 'rb') as f:
+                payload = orjson.loads(await f.read())
+        except (OSError, orjson.JSONDecodeError):
+            # Cache file missing or not usable, caller does a fresh scrape
+            return None, None, False
+
+        # Older cache files are a bare list; newer ones carry the etag
+        if isinstance(payload, dict):
+            job_postings = payload.get('jobs', [])
+            etag = payload.get('etag')
+        else:
+            job_postings = payload
+            etag = None
+
+        # Older cache files may predate the derived fields
+        for job in job_postings:
+            job.setdefault('preview', _make_preview(job['text']))
+
+        return job_postings, etag, file_age < self.SCRAPE_TTL
+
+    async def _write_cache(self, cache_file: str, etag: str, job_postings: List[Dict[str, Any]]):
+        """Persist jobs and the thread's etag; also refreshes the TTL mtime"""
+        try:
+            async with aiofiles.open(cache_file, 'wb') as f:
+                await f.write(orjson.dumps({'etag': etag, 'jobs': job_postings}))
+        except OSError:
+            # Silently continue if caching fails
+            pass
+
+    async def _do_scrape(self, hn_thread_id: str) -> List[Dict[str, Any]]:
+        """Perform the actual cache check, fetch, and parse for one thread"""
+        cache_file = None
+        cached_jobs = None
+        cached_etag = None
+
+        # Check cache only if caching is enabled
+        if self.enable_cache and self.cache_dir:
+            cache_file = os.path.join(self.cache_dir, f"hn_jobs_{hn_thread_id}.json")
+            cached_jobs, cached_etag, fresh = await self._load_cache(cache_file)
+            if cached_jobs is not None and fresh:
+                logger.debug("Loading from cache: %s", cache_file)
+                await asyncio.to_thread(self._set_corpus, cached_jobs)
+                return cached_jobs
+
+        logger.info("Scraping HackerNews thread: %s", hn_thread_id)
+
+        try:
+            # Conditional GET: a 304 means the thread hasn't changed and the
+            # stale cache can be revalidated without fetching any items
+            root, etag = await self._fetch_root(hn_thread_id, cached_etag)
+
+            if root is None and cached_jobs is not None:
+                logger.debug("Thread %s unchanged, revalidating cache", hn_thread_id)
+                await self._write_cache(cache_file, cached_etag, cached_jobs)
+                await asyncio.to_thread(self._set_corpus, cached_jobs)
+                return cached_jobs
+
+            kids = root.get('kids', []) if root else []
+
+            # Fetch all top-level comments concurrently over the shared session
+            items = await asyncio.gather(
+                *(self._fetch_item(kid) for kid in kids),
+                return_exceptions=True
+            )
+
+            fetched = []
+            for kid, item in zip(kids, items):
+                if isinstance(item, BaseException):
+                    logger.warning("Error fetching item %s: %s", kid, item)
                     continue
-            
+                fetched.append(item)
+
+            job_postings = await self._build_postings(fetched, hn_thread_id)
+
             # Cache the results
-            if self.enable_cache and self.cache_dir:
-                try:
-                    cache_file = os.path.join(self.cache_dir, f"hn_jobs_{hn_thread_id}.json")
-                    with open(cache_file, 'w') as f:
-                        json.dump(job_postings, f, indent=2)
-                except OSError:
-                    # Silently continue if caching fails
-                    pass
-            
-            print(f"Scraped {len(job_postings)} job postings")
+            if cache_file:
+                await self._write_cache(cache_file, etag, job_postings)
+
+            logger.info("Scraped %d job postings", len(job_postings))
+            await asyncio.to_thread(self._set_corpus, job_postings)
             return job_postings
-            
-        except requests.RequestException as e:
-            print(f"Error fetching HackerNews thread: {e}")
-            return []
-    
-    def search_jobs(self, query: str, job_postings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            # Propagate so the memoizer evicts this task instead of serving
+            # an empty snapshot as a fresh result for the whole TTL
+            logger.error("Error fetching HackerNews thread: %s", e)
+            raise
+
+    async def _fetch_root(self, item_id, etag: str = None):
         """
-        Simple text search through job postings
+        Fetch the thread's root item with a conditional GET.
+        Returns (json, etag); json is None when the server answers 304.
         """
-        query_lower = query.lower()
-        matching_jobs = []
-        
-        for job in job_postings:
-            if query_lower in job['text'].lower():
-                matching_jobs.append(job)
-        
-        return matching_jobs
+        url = f"{self.api_url}/item/{item_id}.json"
+        headers = {'X-Firebase-ETag': 'true'}
+        if etag:
+            headers['If-None-Match'] = etag
 
-if __name__ == "__main__":
+        session = self._get_session()
+        async with self._fetch_semaphore:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    return None, etag
+                response.raise_for_status()
+                return await response.json(), response.headers.get('ETag')
+
+    def _get_db(self) -> sqlite3.Connection:
+        """Get (or lazily create) the FTS5 search database"""
+        if self._db is None:
+            if self.cache_dir:
+                db_path = os.path.join(self.cache_dir, "jobs_fts.db")
+            else:
+                db_path = ":memory:"
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS jobs USING fts5("
+                "id UNINDEXED, author UNINDEXED, timestamp UNINDEXED, "
+                "preview UNINDEXED, text, tokenize='porter unicode61')"
+            )
+        return self._db
+
+    def _set_corpus(self, job_postings: List[Dict[str, Any]]):
+        """Replace the FTS corpus with the latest scrape, in one transaction"""
+        with self._db_lock:
+            db = self._get_db()
+            with db:
+                db.execute("DELETE FROM jobs")
+                db.executemany(
+                    "INSERT INTO jobs (id, author, timestamp, preview, text) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    ((job['id'], job['author'], job['timestamp'], job['preview'], job['text'])
+                     for job in job_postings)
+                )
+
+    @staticmethod
+    def _fts_match(query: str) -> str:
+        """
+        Compile a user query to an FTS5 MATCH expression. The query is split
+        on the keyword 'OR' into alternatives; tokens within an alternative
+        must all match. Tokens are quoted so user input can't inject FTS
+        syntax.
+        """
+        alternatives = []
+        for alternative in re.split(r"\s+or\s+", query.lower()):
+            tokens = _TOKEN_RE.findall(alternative)
+            if tokens:
+                alternatives.append('(' + ' '.join(f'"{token}"' for token in tokens) + ')')
+        return ' OR '.join(alternatives)
+
+    def search_jobs(self, query: str, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Search the indexed job postings, best (BM25) matches first,
+        returning at most `limit` rows (all if None)
+        """
+        match = self._fts_match(query)
+        if not match:
+            return []
+
+        sql = ("SELECT id, author, timestamp, preview FROM jobs "
+               "WHERE jobs MATCH ? ORDER BY bm25(jobs)")
+        params = [match]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        return [
+            {'id': row[0], 'author': row[1], 'timestamp': row[2], 'preview': row[3]}
+            for row in self._get_db().execute(sql, params)
+        ]
+
+    def count_jobs(self, query: str) -> int:
+        """Count matches without building any result rows"""
+        match = self._fts_match(query)
+        if not match:
+            return 0
+        row = self._get_db().execute(
+            "SELECT count(*) FROM jobs WHERE jobs MATCH ?", (match,)
+        ).fetchone()
+        return row[0]
+
+async def main():
     scraper = HackerNewsScraper(cache_dir="cache")  # Use cache dir when run directly
-    jobs = scraper.scrape_job_postings()
-    print(f"Found {len(jobs)} job postings")
-    
-    # Example search
-    if jobs:
-        python_jobs = scraper.search_jobs("python", jobs)
-        print(f"Found {len(python_jobs)} Python jobs")
\ No newline at end of file
+    try:
+        jobs = await scraper.scrape_job_postings()
+        print(f"Found {len(jobs)} job postings")
+
+        # Example search
+        if jobs:
+            python_jobs = scraper.search_jobs("python")
+            print(f"Found {len(python_jobs)} Python jobs")
+    finally:
+        await scraper.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())